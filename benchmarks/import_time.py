@@ -0,0 +1,76 @@
+"""
+Measures the cold import time of the app and each utils module.
+
+Every module is imported in a fresh interpreter, several times, and the median wall time is reported
+along with the heavy dependencies the import pulled in. Run from the repository root:
+
+    python benchmarks/import_time.py [--repeat 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "utils.sequence_extract",
+    "utils.uniprot_utils",
+    "utils.align_sequence",
+    "utils.format_gps_entry",
+    "utils.process_output",
+    "utils.plot_utils",
+    "utils.results_view",
+    "utils.condition_compare",
+    "utils.window_index",
+    "utils.job_queue",
+    "streamlit_app",
+]
+HEAVY_MODULES = ["streamlit", "matplotlib", "plotly", "scipy", "requests"]
+
+SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def time_import(module, repeat):
+    """
+    Imports `module` in `repeat` fresh interpreters and returns the median time and the heavy modules loaded.
+    """
+    times = []
+    loaded = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", SNIPPET.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=REPO_ROOT, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1:]
+        measurement = json.loads(result.stdout.strip().splitlines()[-1])
+        times.append(measurement["seconds"])
+        loaded = measurement["loaded"]
+    return statistics.median(times), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module")
+    args = parser.parse_args()
+
+    print(f"{'module':<28} {'median (s)':>10}  heavy dependencies loaded")
+    for module in MODULES:
+        seconds, loaded = time_import(module, args.repeat)
+        if seconds is None:
+            print(f"{module:<28} {'failed':>10}  {' '.join(loaded)}")
+        else:
+            print(f"{module:<28} {seconds:>10.3f}  {', '.join(loaded) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
+import json
+import time
 import traceback
+from io import BytesIO
 import streamlit as st
 import pandas as pd
 import utils.sequence_extract as sequence_extract
@@ -6,11 +9,409 @@ import utils.align_sequence as align_sequence
 import utils.format_gps_entry as format_gps_entry
 import utils.process_output as process_output
 import utils.plot_utils as plot_utils
+import utils.job_queue as job_queue
+import utils.results_view as results_view
+import utils.condition_compare as condition_compare
+import utils.window_index as window_index
 from utils.uniprot_utils import fetch_all_sequences
 
 
+def session_results():
+    """
+    Returns the per-session cache of stage results, keyed like the stages that produced them.
+    """
+    return st.session_state.setdefault("stage_results", {})
+
+
+def session_cached(key, fn):
+    """
+    Returns the cached result of `fn()` for `key`, computing it only the first time, so polling
+    reruns do not repeat work on the main thread.
+    """
+    results = session_results()
+    st.session_state["used_results"].add(key)
+    if key not in results:
+        results[key] = fn()
+    return results[key]
+
+
+def run_stage(key, stage, fn, make_args):
+    """
+    Runs a pipeline stage as a background job, submitting it only once per `key`.
+
+    `make_args` returns the tuple of arguments passed to `fn`. It is only called when the job is
+    actually submitted, so uploads are not copied into a payload on every rerun.
+
+    While the job is running a progress bar is drawn and None is returned; the script is
+    rerun until the job finishes. The result is then cached in the session (and the job removed),
+    so later reruns return it without touching the job table. A failed job raises until the
+    user retries it.
+    """
+    results = session_results()
+    st.session_state["used_results"].add(key)
+    if key in results:
+        return results[key]
+
+    failed = st.session_state.setdefault("failed_jobs", {})
+    if key in failed:
+        if not st.button(f"Retry: {stage}", key=f"retry:{key}"):
+            raise RuntimeError(f"{stage} failed:\n{failed[key]}")
+        del failed[key]
+
+    jobs = st.session_state.setdefault("jobs", {})
+    job = job_queue.get_job(jobs[key]) if key in jobs else None
+    if job is None:
+        jobs[key] = job_queue.submit_job(stage, fn, *make_args())
+        job = job_queue.get_job(jobs[key])
+
+    if job["status"] == job_queue.DONE:
+        results[key] = job_queue.fetch_result(jobs[key])
+        job_queue.delete_job(jobs.pop(key))
+        return results[key]
+    if job["status"] == job_queue.FAILED:
+        failed[key] = job["error"]
+        job_queue.delete_job(jobs.pop(key))
+        raise RuntimeError(f"{stage} failed:\n{failed[key]}")
+
+    st.progress(job["progress"], text=f"{stage} ({job['status']})")
+    st.session_state["jobs_pending"] = True
+    return None
+
+
+def show_table(df, key, default_columns=None, page_size=100):
+    """
+    Displays one page of a dataframe, with column selection, instead of sending the whole frame to the browser.
+    """
+    columns = st.multiselect(
+        "Columns", list(df.columns), default=default_columns or list(df.columns), key=f"{key}_columns"
+    )
+    n_pages = results_view.page_count(len(df), page_size)
+    page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1, key=f"{key}_page")
+    st.dataframe(results_view.get_page(df, page - 1, page_size, columns))
+    st.caption(f"{len(df):,} rows in total")
+
+
+def show_pie_chart(df, group_col, **kwargs):
+    """
+    Draws a kinase pie chart from `plot_utils.plot_kinase_pie_chart`, or the reasons it could not be drawn.
+    """
+    fig, diagnostics = plot_utils.plot_kinase_pie_chart(df, group_col, **kwargs)
+    for message in diagnostics:
+        st.warning(message)
+    if fig is not None:
+        st.subheader(f"{group_col} Distribution")
+        st.plotly_chart(fig)
+
+
+def process_input_file(uploaded_file, mod_types):
+    try:
+        file_key = f"{uploaded_file.name}:{uploaded_file.size}:{','.join(mod_types)}"
+        parsed = run_stage(
+            f"read:{file_key}",
+            "Reading and parsing the input file",
+            sequence_extract.read_mass_spec_file,
+            lambda: (BytesIO(uploaded_file.getvalue()), mod_types),
+        )
+        if parsed is None:
+            return
+        df, parsed_df, diagnostics = parsed
+        for message in diagnostics:
+            st.error(message)
+        if diagnostics:
+            return
+
+        show_table(df, "input")
+        fetched = run_stage(
+            f"fetch:{file_key}",
+            "Fetching sequences from UniProt",
+            fetch_all_sequences,
+            lambda: (parsed_df,),
+        )
+        if fetched is None:
+            return
+        complete_df, missing_fasta_dict, fasta_dict = fetched
+
+        st.success("Sequences fetched successfully!")
+        if missing_fasta_dict:
+            st.warning("Some accessions were not found in the UniProt database. Please check the following:")
+            for accession, (new_accession, sequence) in missing_fasta_dict.items():
+                st.write(f"Obsolete Accession: {accession}, New Accession: {new_accession}")
+
+        aligned_df = session_cached(
+            f"align:{file_key}",
+            lambda: align_sequence.align_peptide_sequence(complete_df.dropna(subset=["sequence"])),
+        )
+        st.success("Peptide sequences aligned successfully!")
+
+        show_table(aligned_df, "aligned", [col for col in aligned_df.columns if col != "sequence"])
+        st.info("Generating GPS input format and csv file...")
+
+        gps_input = session_cached(f"gps_input:{file_key}", lambda: format_gps_entry.generate_gps_input(aligned_df))
+        st.download_button(
+            label="Download GPS Input",
+            data=gps_input,
+            file_name="gps_input.txt",
+            mime="text/plain",
+            icon=":material/download:"
+        )
+
+        shard_size = st.number_input(
+            "Sequences per GPS submission", min_value=1, value=format_gps_entry.DEFAULT_SHARD_SIZE, step=100
+        )
+        st.download_button(
+            label="Download Sharded GPS Input (zip)",
+            data=session_cached(
+                f"gps_shards:{file_key}:{shard_size}",
+                lambda: format_gps_entry.generate_gps_input_shards(aligned_df, shard_size).getvalue(),
+            ),
+            file_name="gps_input_shards.zip",
+            mime="application/zip",
+            icon=":material/download:"
+        )
+
+        excel_buffer = session_cached(
+            f"excel:{file_key}", lambda: format_gps_entry.prepare_excel_download(aligned_df).getvalue()
+        )
+
+        st.download_button(
+            label="Download Full Excel File",
+            data=excel_buffer,
+            file_name="full_data.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            icon=":material/download:"
+        )
+
+        st.success("GPS input format generated successfully!")
+    except:
+        st.error("An error occurred while processing the file. Please ensure it is formatted correctly.")
+        st.text(traceback.format_exc())
+
+
+def upload_buffers(files):
+    """
+    Helper function copying uploaded file(s) into picklable buffers for a background job.
+    """
+    if isinstance(files, list):
+        return [BytesIO(file.getvalue()) for file in files]
+    return BytesIO(files.getvalue())
+
+
+def process_output_files(output_files, manifest_file=None):
+    aggregate_df = pd.DataFrame()
+    st.info("Processing Output file(s)")
+
+    # each submission is (label, job key, files passed to read_and_process_csv, default condition)
+    submissions = []
+    if manifest_file:
+        manifest = json.loads(manifest_file.getvalue())
+        files_by_name = {file.name: file for file in output_files}
+
+        def match_shards():
+            ordered, missing, unmatched = process_output.order_shard_files(output_files, manifest)
+            return [file.name for file in ordered], missing, [file.name for file in unmatched]
+
+        # matching reads the start of every file, so it is only redone when the uploads change
+        ordered_names, missing, unmatched_names = session_cached(
+            f"shards:{manifest_file.name}:{manifest_file.size}:" + ":".join(f"{f.name}:{f.size}" for f in output_files),
+            match_shards,
+        )
+        ordered_files = [files_by_name[name] for name in ordered_names]
+        output_files = [files_by_name[name] for name in unmatched_names]
+        if missing:
+            st.warning(f"No GPS output found for the following shards: {', '.join(missing)}")
+        if unmatched_names:
+            st.warning(
+                f"The following files are not part of the sharded submission and are parsed separately: "
+                f"{', '.join(unmatched_names)}"
+            )
+        if ordered_files:
+            submissions.append((
+                f"{len(ordered_files)} sharded output file(s)",
+                "parse-shards:" + ":".join(f"{file.name}:{file.size}" for file in ordered_files),
+                ordered_files,
+                "sharded",
+            ))
+    for file in output_files:
+        submissions.append((
+            file.name, f"parse:{file.name}:{file.size}", file, file.name.rsplit(".", 1)[0]
+        ))
+
+    parsing = False
+    condition_keys = {}
+    for label, key, files, default_condition in submissions:
+        condition = st.text_input(f"Condition for {label}", value=default_condition, key=f"condition:{key}")
+        try:
+            processed_df = run_stage(
+                key, f"Parsing {label}", process_output.read_and_process_csv, lambda files=files: (upload_buffers(files),)
+            )
+            if processed_df is None:
+                parsing = True
+                continue
+            processed_df = session_cached(f"split:{key}", lambda: plot_utils.split_kinase_hierarchy(processed_df))
+            processed_df = processed_df.assign(Condition=condition)
+            aggregate_df = pd.concat([aggregate_df, processed_df])
+            aggregate_df = aggregate_df.reset_index(drop=True)
+            # only results that made it into aggregate_df identify a condition's data
+            condition_keys.setdefault(condition, []).append(key)
+        except:
+            st.error("An error occured while processing the output. Please ensure it is formatted correctly.")
+            st.text(traceback.format_exc())
+
+    if parsing or st.session_state["jobs_pending"]:
+        # the results below are only drawn once, after every background job has finished
+        st.info("Waiting for the remaining background jobs to finish...")
+        return
+
+    # the contours are percentages of rows, so a uniform sample draws the same surface
+    contour_df = results_view.downsample(aggregate_df, 200_000, columns=["Score", "Cutoff"])
+    fig = plot_utils.percent_contour(contour_df, levels=(5,10,25,50,75))
+    
+    st.pyplot(fig, clear_figure=True)
+
+    absolute_cutoff = st.number_input("Absolute Cutoff", min_value = 0.0, max_value = 0.9, value = 0.5)
+    relative_cutoff = st.number_input("Relative Cutoff", min_value = 0.0, max_value = 0.9, value = 0.5)
+    
+    aggregate_df, diagnostics = process_output.filter_output(aggregate_df, absolute_cutoff, relative_cutoff)
+    for message in diagnostics:
+        st.error(message)
+    st.success("Successfully Processed Output File!")
+    unique_groups = aggregate_df["Kinase_Group"].dropna().unique()
+    st.info("Plotting Kinase Distribution")
+
+    st.markdown("---")
+    show_pie_chart(aggregate_df, group_col="Kinase", counts=results_view.group_counts(aggregate_df, "Kinase"))
+    selected_group = st.selectbox("Select Kinase Group to explore subfamilies:", sorted(unique_groups))
+
+    subgroup_counts = results_view.group_counts(aggregate_df, ["Kinase_Group", "Kinase_Subgroup"])
+    st.info(f"Subfamily distribution within {selected_group}")
+    show_pie_chart(
+        aggregate_df, group_col="Kinase_Subgroup", pct=True, legend=True,
+        counts=subgroup_counts[subgroup_counts.index.get_level_values("Kinase_Group") == selected_group].droplevel("Kinase_Group"),
+    )
+
+    st.markdown("---")
+
+    num_top_k = st.number_input(
+        "Filter for top-k per kinase predictions", 
+        min_value=1, 
+        max_value=5
+    )
+
+    if num_top_k:
+        df = process_output.filter_top_kinase_mod(aggregate_df, num_top_k)
+        st.session_state["filtered_df"] = df  
+    else:
+        st.session_state["filtered_df"] = aggregate_df.head(0)
+
+    show_table(st.session_state["filtered_df"], "top_k")
+
+    st.markdown("---")
+    st.subheader("Motif Search")
+    motif = st.text_input("Motif (e.g. `P` or `R..S`; `.`/`x` = any residue, `[ST]` = either)", key="motif")
+    anchored = st.checkbox("Anchor the motif at a position relative to the modified residue", key="motif_anchored")
+    motif_offset = st.number_input("Offset of the first motif residue", min_value=-10, max_value=10, value=1, disabled=not anchored)
+    if motif:
+        # the index only depends on the filtered rows, so it is rebuilt when the files, cutoffs or rows change
+        index_key = (
+            tuple((condition, tuple(keys)) for condition, keys in condition_keys.items()),
+            absolute_cutoff, relative_cutoff, len(aggregate_df),
+        )
+        if st.session_state.get("window_index_key") != index_key:
+            st.session_state["window_index"] = window_index.build_window_index(
+                aggregate_df["Peptide"], aggregate_df["Position"] - 1
+            )
+            st.session_state["window_index_key"] = index_key
+        motif_df, diagnostics = process_output.filter_motif(
+            aggregate_df, motif, motif_offset if anchored else None, index=st.session_state["window_index"]
+        )
+        for message in diagnostics:
+            st.error(message)
+        if not diagnostics:
+            show_table(motif_df, "motif")
+
+    if len(condition_keys) > 1:
+        st.markdown("---")
+        show_condition_comparison(aggregate_df, condition_keys, (absolute_cutoff, relative_cutoff))
+
+    st.markdown("---")
+    st.subheader("Final Output Data")
+
+    output_cleaned = session_cached(
+        f"excel-output:{condition_keys}:{absolute_cutoff}:{relative_cutoff}",
+        lambda: format_gps_entry.prepare_excel_download(aggregate_df).getvalue(),
+    )
+    show_table(aggregate_df, "final")
+    st.download_button(
+        label="Download As Excel File",
+        data=output_cleaned,
+        file_name="processed_output.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        icon=":material/download:"
+    )
+
+    # absolute difference score - cutoff > 0.15 
+
+    # relative difference (score - cutoff) / (1-cutoff) > x
+
+    # filter top k kinase predictions
+
+   
+
+    # show low confidence predictions in full data pi chart
+
+    # show 2nd, third level groupings among whole pi chart
+
+    # maybe 4th level groups in whole data
+
+
+def show_condition_comparison(aggregate_df, condition_keys, cutoffs):
+    """
+    Displays kinase count matrices and enrichment statistics across the uploaded conditions.
+
+    Per-condition counts are cached in the session, so only conditions whose files or cutoffs
+    changed are recounted.
+    """
+    st.subheader("Condition Comparison")
+    comparison = st.session_state.setdefault("comparison", condition_compare.new_comparison())
+    for condition in list(comparison["keys"]):
+        if condition not in condition_keys:
+            condition_compare.remove_condition(comparison, condition)
+    cache_keys = {condition: (tuple(sorted(keys)), cutoffs) for condition, keys in condition_keys.items()}
+    stale = [
+        condition for condition, key in cache_keys.items()
+        if not condition_compare.is_cached(comparison, condition, key)
+    ]
+    if stale:
+        # one pass over the rows splits out every condition that needs recounting
+        by_condition = aggregate_df.groupby("Condition", sort=False)
+        for condition in stale:
+            condition_df = (
+                by_condition.get_group(condition) if condition in by_condition.groups else aggregate_df.head(0)
+            )
+            condition_compare.add_condition(comparison, condition, condition_df, key=cache_keys[condition])
+
+    group_col = st.selectbox("Kinase level", list(condition_compare.DEFAULT_GROUP_COLS), key="comparison_level")
+    reference = st.selectbox(
+        "Compare against", ["All other conditions"] + list(condition_keys), key="comparison_reference"
+    )
+    matrix = condition_compare.count_matrix(comparison, group_col)
+    st.dataframe(matrix)
+    stats = condition_compare.enrichment_stats(
+        matrix, reference=None if reference == "All other conditions" else reference
+    )
+    show_table(stats, "comparison_stats")
+    st.download_button(
+        label="Download Enrichment Statistics",
+        data=format_gps_entry.prepare_excel_download(stats),
+        file_name="kinase_enrichment.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        icon=":material/download:"
+    )
+
 
 def main():
+    st.session_state["jobs_pending"] = False
+    st.session_state["used_results"] = set()
     st.title("Downstream Output Grapher & Bounded Amino-Acid Region for Kinase prediction (DOGBARK)")
     docs_tab, usage_tab, results_tab = st.tabs(["Documentation", "Usage", "Results"])
     with docs_tab:
@@ -20,7 +421,8 @@ def main():
             - The following columns must be present in the excel file in exact case and spelling:
                 - Modifications in Master Proteins
                 - Master Protein Descriptions
-            - Additionally, the file must be for singular amino acid modifications only (does not support multiple different AA modifications in the same file)
+            - Entries may list several master proteins (separated by `;`), isoform accessions such as `P12345-2`, and several modification types.
+              Only the modification types selected in the sidebar (Phospho by default) are expanded into sites.
         """)
         st.markdown("""
             - Each entry in `Modifications in Master Proteins` is expected to follow this standardized format. Confidence scores are optional:
@@ -33,6 +435,7 @@ def main():
 
                 ```
                 Q62261  3xPhospho [S2315(97.6); S2318(100); S2322(97.6)]
+                P12345-2  1xAcetyl [K5]; 2xPhospho [S15(99.1); T20]; Q67890 1xPhospho [Y7(100)]
                 ```
             """)
         
@@ -71,7 +474,9 @@ def main():
             1. Begin by uploading mass spectrometry input data.
             2. The results will appear in the results section with several intermediate log comments.
             3. A table will be displayed with the following columns:
-                - `accession`: Accession of the protein.
+                - `accession`: Accession of the protein (including the isoform suffix, if any).
+                - `canonical_accession`: Accession of the canonical protein.
+                - `modification`: The type of modification (e.g. Phospho).
                 - `residue`: The modification that was present in the mass spec data.
                 - `confidence`: The confidence in the detected modification.
                 - `gene_name`: The gene name for the corresponding accession.
@@ -84,6 +489,10 @@ def main():
                     >gene|Center = #
                     [extracted_sequence]
                     ```
+                - A second button downloads the same input split into parts of at most the chosen number of
+                  sequences, zipped together with a `manifest.json`. Headers in the parts carry the part number
+                  (`>gene|Center = #|Shard = N`). Upload the manifest with the GPS output of
+                  every part to have the parts put back together in order.
             5. A downloadable Excel file button will appear.
                 - This Excel file is the table described in step 3.
             """)
@@ -106,6 +515,13 @@ def main():
                 - `Kinase_Group`: The top level (primary) kinase prediction.
                 - `Kinase_Subgroup`: The secondary level kinase prediction.
             7. A download button will appear to download the table described in 6. 
+            8. A motif search filters the table to peptides matching a motif, either anywhere in the 21 AA window
+               or anchored at an offset from the modified residue (e.g. `P` at +1 for proline-directed sites).
+            9. Each uploaded file is tagged with a condition (its file name by default). When more than one
+               condition is present, a kinase-by-condition count matrix and enrichment statistics are shown:
+                - `count` / `expected`: Predictions for the kinase in the condition, observed and expected.
+                - `fold_enrichment` / `odds_ratio`: Effect size against the chosen background.
+                - `p_value` / `q_value`: One-sided hypergeometric (Fisher's exact) test, and its Benjamini-Hochberg correction.
         """)
     st.markdown("---")
 
@@ -117,143 +533,28 @@ def main():
         with st.sidebar:
             uploaded_file = st.file_uploader("Upload Mass Spec Excel File", type=["xlsx"])
             output_files = st.file_uploader("Upload one or multiple GPS Output File(s)", type=["csv"], accept_multiple_files=True)
+            manifest_file = st.file_uploader("Upload Shard Manifest (optional)", type=["json"])
+            mod_types_str = st.text_input("Modification types to expand (comma separated)", value="Phospho")
+            mod_types = [mod.strip() for mod in mod_types_str.split(",") if mod.strip()]
         if uploaded_file:
             with st.expander("Mass Spec Input File Processing", expanded=True):
-                try:
-                    df = pd.read_excel(uploaded_file)
-                    required_columns = {"Master Protein Descriptions", "Modifications in Master Proteins", "Annotated Sequence"}
-                    if not required_columns.issubset(df.columns):
-                        st.error(f"Input file must contain the following columns: {required_columns}")
-                        return
-
-                    df = df.dropna(subset=["Modifications in Master Proteins"]).copy()
-                    st.dataframe(df)
-                    all_entries = df.apply(sequence_extract.parse_modifications, axis=1)
-                    
-                    flat_entries = [item for sublist in all_entries for item in sublist]
-
-                    
-                    parsed_df = pd.DataFrame(flat_entries)
-                    with st.spinner("Fetching sequences from UniProt..."):
-                        complete_df, missing_fasta_dict, fasta_dict = fetch_all_sequences(parsed_df)
-
-                    complete_df = complete_df.dropna(subset=["sequence"]).copy()
-                    st.success("Sequences fetched successfully!")
-                    if missing_fasta_dict:
-                        st.warning("Some accessions were not found in the UniProt database. Please check the following:")
-                        for accession, (new_accession, sequence) in missing_fasta_dict.items():
-                            st.write(f"Obsolete Accession: {accession}, New Accession: {new_accession}")
-
-                    st.info("Aligning peptide sequences...")
-                    aligned_df = align_sequence.align_peptide_sequence(complete_df)
-                    st.success("Peptide sequences aligned successfully!")
-
-                    st.dataframe(aligned_df)
-                    st.info("Generating GPS input format and csv file...")
-
-                    gps_input = format_gps_entry.generate_gps_input(aligned_df)
-                    st.download_button(
-                        label="Download GPS Input",
-                        data=gps_input,
-                        file_name="gps_input.txt",
-                        mime="text/plain",
-                        icon=":material/download:"
-                    )
-
-                    excel_buffer = format_gps_entry.prepare_excel_download(aligned_df)
-
-                    st.download_button(
-                        label="Download Full Excel File",
-                        data=excel_buffer,
-                        file_name="full_data.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        icon=":material/download:"
-                    )
-
-                    st.success("GPS input format generated successfully!")
-                except:
-                    st.error("An error occurred while processing the file. Please ensure it is formatted correctly.")
-                    st.text(traceback.format_exc())
+                process_input_file(uploaded_file, mod_types)
         
         
         if output_files:
             with st.expander("GPS Output File Processing", expanded=True):
-                aggregate_df = pd.DataFrame()
-                st.info("Processing Output file(s)")
-                for file in output_files:
-                    try:
-                        output = pd.read_csv(file)
-                        processed_df = process_output.process_custom_csv(output)
-                        processed_df = plot_utils.split_kinase_hierarchy(processed_df)
-                        aggregate_df = pd.concat([aggregate_df, processed_df])
-                        aggregate_df = aggregate_df.reset_index(drop=True)
-                    except:
-                        st.error("An error occured while processing the output. Please ensure it is formatted correctly.")
-                        st.text(traceback.format_exc())
-                
-                fig = plot_utils.percent_contour(aggregate_df, levels=(5,10,25,50,75))
-                
-                st.pyplot(fig, clear_figure=True)
-
-                absolute_cutoff = st.number_input("Absolute Cutoff", min_value = 0.0, max_value = 0.9, value = 0.5)
-                relative_cutoff = st.number_input("Relative Cutoff", min_value = 0.0, max_value = 0.9, value = 0.5)
-                
-                aggregate_df = process_output.filter_output(aggregate_df, absolute_cutoff, relative_cutoff)
-                st.success("Successfully Processed Output File!")
-                unique_groups = aggregate_df["Kinase_Group"].dropna().unique()
-                st.info("Plotting Kinase Distribution")
-
-                st.markdown("---")
-                plot_utils.plot_kinase_pie_chart(aggregate_df, group_col="Kinase")
-                selected_group = st.selectbox("Select Kinase Group to explore subfamilies:", sorted(unique_groups))
-    
-                filtered_df = aggregate_df[aggregate_df["Kinase_Group"] == selected_group]
-                st.info(f"Subfamily distribution within {selected_group}")
-                plot_utils.plot_kinase_pie_chart(filtered_df, group_col="Kinase_Subgroup",pct=True, legend=True)
-
-                st.markdown("---")
-
-                num_top_k = st.number_input(
-                    "Filter for top-k per kinase predictions", 
-                    min_value=1, 
-                    max_value=5
-                )
-
-                if num_top_k:
-                    df = process_output.filter_top_kinase_mod(aggregate_df, num_top_k)
-                    st.session_state["filtered_df"] = df  
-                else:
-                    st.session_state["filtered_df"] = aggregate_df.head(0)
-
-                st.dataframe(st.session_state["filtered_df"])
+                process_output_files(output_files, manifest_file)
 
-                st.markdown("---")
-                st.subheader("Final Output Data")
+    # drop cached results of files that are no longer uploaded
+    results = session_results()
+    for key in set(results) - st.session_state["used_results"]:
+        del results[key]
 
-                output_cleaned = format_gps_entry.prepare_excel_download(aggregate_df)
-                st.dataframe(aggregate_df)
-                st.download_button(
-                    label="Download As Excel File",
-                    data=output_cleaned,
-                    file_name="processed_output.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    icon=":material/download:"
-                )
+    if st.session_state["jobs_pending"]:
+        # poll the job table until every submitted stage has finished
+        time.sleep(1)
+        st.rerun()
 
-                # absolute difference score - cutoff > 0.15 
 
-                # relative difference (score - cutoff) / (1-cutoff) > x
-
-                # filter top k kinase predictions
-
-               
-
-                # show low confidence predictions in full data pi chart
-
-                # show 2nd, third level groupings among whole pi chart
-
-                # maybe 4th level groups in whole data
-
-        
 if __name__ == "__main__":
     main()
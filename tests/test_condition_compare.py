@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import fisher_exact
+
+from utils.condition_compare import (
+    add_condition, benjamini_hochberg, count_matrix, enrichment_stats, is_cached, new_comparison,
+    remove_condition,
+)
+
+
+@pytest.fixture
+def matrix():
+    return pd.DataFrame(
+        {"control": [10, 5, 0], "treated": [2, 8, 6], "other": [4, 4, 4]},
+        index=pd.Index(["AGC", "CMGC", "TK"], name="Kinase_Group"),
+    )
+
+
+def test_benjamini_hochberg():
+    p_values = [0.01, 0.04, 0.03, 0.5]
+    # p * n / rank, made monotone from the largest p-value down
+    expected = [0.04, 0.04 * 4 / 3, 0.04 * 4 / 3, 0.5]
+    assert np.allclose(benjamini_hochberg(p_values), expected)
+    assert np.allclose(benjamini_hochberg([0.9, 0.95]), [0.95, 0.95])
+    assert len(benjamini_hochberg([])) == 0
+
+
+@pytest.mark.parametrize("reference", [None, "control"])
+def test_enrichment_matches_one_sided_fisher(matrix, reference):
+    stats = enrichment_stats(matrix, reference=reference)
+    for row in stats.itertuples(index=False):
+        a = matrix.loc[row.Kinase_Group, row.condition]
+        n = matrix[row.condition].sum()
+        if reference is None:
+            background = matrix.drop(columns=row.condition).sum(axis=1)
+        else:
+            background = matrix[reference]
+        bg = background[row.Kinase_Group]
+        _, p_value = fisher_exact([[a, n - a], [bg, background.sum() - bg]], alternative="greater")
+        assert row.count == a
+        assert row.p_value == pytest.approx(p_value)
+
+    conditions = set(matrix.columns) - ({reference} if reference else set())
+    assert set(stats["condition"]) == conditions
+    assert len(stats) == len(matrix.index) * len(conditions)
+    assert np.allclose(stats["q_value"], benjamini_hochberg(stats["p_value"]))
+
+
+def test_add_replace_and_remove_conditions():
+    comparison = new_comparison()
+    control = pd.DataFrame({"Kinase_Group": ["AGC", "AGC", "TK"]})
+    treated = pd.DataFrame({"Kinase_Group": ["TK", "TK"]})
+    add_condition(comparison, "control", control, group_cols=["Kinase_Group"], key="a")
+    add_condition(comparison, "treated", treated, group_cols=["Kinase_Group"], key="b")
+    assert is_cached(comparison, "control", "a")
+    assert not is_cached(comparison, "control", "other")
+    assert not is_cached(comparison, "control", None)
+
+    # a cached key skips the dataframe entirely
+    add_condition(comparison, "control", pd.DataFrame({"Kinase_Group": ["CMGC"]}), group_cols=["Kinase_Group"], key="a")
+    assert count_matrix(comparison)["control"].to_dict() == {"AGC": 2, "TK": 1}
+
+    # a new key replaces the counts of that condition only
+    add_condition(comparison, "control", pd.DataFrame({"Kinase_Group": ["CMGC"]}), group_cols=["Kinase_Group"], key="c")
+    matrix = count_matrix(comparison)
+    assert matrix["control"].to_dict() == {"CMGC": 1, "TK": 0}
+    assert matrix["treated"].to_dict() == {"CMGC": 0, "TK": 2}
+
+    remove_condition(comparison, "treated")
+    assert list(count_matrix(comparison).columns) == ["control"]
+    assert not is_cached(comparison, "treated", "b")
@@ -0,0 +1,72 @@
+import json
+import zipfile
+from io import BytesIO
+
+import pandas as pd
+
+from utils.format_gps_entry import MANIFEST_NAME, generate_gps_input_shards
+from utils.process_output import order_shard_files, read_and_process_csv
+
+
+def fake_gps_output(fasta, name, drop=()):
+    """
+    Mimics the GPS output CSV of a FASTA input: one prediction at the center of every sequence,
+    except for the headers in `drop`, which GPS leaves out when it predicts nothing.
+    """
+    lines = ["ID,Position,Code,Kinase,Peptide,Score,Cutoff"]
+    records = fasta.strip().split("\n")
+    for header, peptide in zip(records[::2], records[1::2]):
+        if header in drop:
+            continue
+        center = int(header.split("|")[1].split("=")[1])
+        lines.append(header)
+        lines.append(f"1,{center + 1},S,AGC/PKA/PKACA,{peptide},10.0,5.0")
+    file = BytesIO(("\n".join(lines) + "\n").encode())
+    file.name = name
+    return file
+
+
+def test_sharded_round_trip_with_dropped_header_and_shuffled_files():
+    gps_input = pd.DataFrame({
+        "gene_name": [f"GENE{i}" for i in range(5)],
+        "center_index": [10] * 5,
+        "extracted_sequence": ["AAAAAAAAAASPAAAAAAAAA"] * 5,
+    })
+    with zipfile.ZipFile(generate_gps_input_shards(gps_input, shard_size=2)) as zf:
+        manifest = json.loads(zf.read(MANIFEST_NAME))
+        shards = [zf.read(shard["file"]).decode() for shard in manifest["shards"]]
+    assert [shard["n_sequences"] for shard in manifest["shards"]] == [2, 2, 1]
+
+    # browser-style download names, GPS dropped GENE2 from the second shard, uploaded out of order
+    outputs = [
+        fake_gps_output(shards[0], "download.csv"),
+        fake_gps_output(shards[1], "download (1).csv", drop={">GENE2|Center = 10|Shard = 2"}),
+        fake_gps_output(shards[2], "download (2).csv"),
+    ]
+    stray = BytesIO(b"ID,Position,Code,Kinase,Peptide,Score,Cutoff\n>OTHER|Center = 10\n")
+    stray.name = "other.csv"
+    ordered, missing, unmatched = order_shard_files([outputs[2], stray, outputs[0], outputs[1]], manifest)
+
+    assert [file.name for file in ordered] == ["download.csv", "download (1).csv", "download (2).csv"]
+    assert missing == []
+    assert unmatched == [stray]
+
+    processed = read_and_process_csv(ordered)
+    assert processed["Gene"].tolist() == ["GENE0", "GENE1", "GENE3", "GENE4"]
+    assert (processed["Position"] == 11).all()
+
+
+def test_missing_shard_is_reported():
+    gps_input = pd.DataFrame({
+        "gene_name": ["A", "B"],
+        "center_index": [10, 10],
+        "extracted_sequence": ["AAAAAAAAAASPAAAAAAAAA"] * 2,
+    })
+    with zipfile.ZipFile(generate_gps_input_shards(gps_input, shard_size=1)) as zf:
+        manifest = json.loads(zf.read(MANIFEST_NAME))
+        second = zf.read(manifest["shards"][1]["file"]).decode()
+
+    ordered, missing, unmatched = order_shard_files([fake_gps_output(second, "download.csv")], manifest)
+    assert [file.name for file in ordered] == ["download.csv"]
+    assert missing == [manifest["shards"][0]["file"]]
+    assert unmatched == []
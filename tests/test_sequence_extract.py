@@ -0,0 +1,60 @@
+import pytest
+
+from utils.sequence_extract import parse_modifications
+
+
+def sites(mod_str, desc_str="Protein A OS=Homo sapiens GN=AAA PE=1", mod_types=("Phospho",)):
+    row = {"Modifications in Master Proteins": mod_str, "Master Protein Descriptions": desc_str}
+    return [
+        (entry["accession"], entry["residue"], entry["position"], entry["gene_name"])
+        for entry in parse_modifications(row, mod_types)
+    ]
+
+
+@pytest.mark.parametrize("mod_str, expected", [
+    ("Q62261  3xPhospho [S2315(97.6); S2318(100); S2322(97.6)]",
+     [("Q62261", "S", 2315, "AAA"), ("Q62261", "S", 2318, "AAA"), ("Q62261", "S", 2322, "AAA")]),
+    ("P12345-2 1xPhospho [T20]", [("P12345-2", "T", 20, "AAA")]),
+    ("P12345 1xAcetyl [K5]; 1xPhospho [S15(100)]", [("P12345", "S", 15, "AAA")]),
+    ("P12345 2xTMT6plex [K5; N-Term]; 1xPhospho [S15(100)]", [("P12345", "S", 15, "AAA")]),
+    ("P12345 1xLabel:13C(6) [K5]; 1xPhospho [S15]", [("P12345", "S", 15, "AAA")]),
+    ("P12345 1xPhospho [N-Term]", []),
+    ("not a modification", []),
+])
+def test_single_protein(mod_str, expected):
+    assert sites(mod_str) == expected
+
+
+@pytest.mark.parametrize("mod_str, desc_str, expected", [
+    # the second protein's accession sits on a non-phospho block
+    ("P12345 1xPhospho [S15]; Q67890 1xTMT6plex [K5]; 1xPhospho [S7]",
+     "A GN=AAA PE=1; B GN=BBB PE=1",
+     [("P12345", "S", 15, "AAA"), ("Q67890", "S", 7, "BBB")]),
+    # an unparseable block must not hand its sites to the previous protein
+    ("P12345 1xPhospho [S15]; ???; 1xPhospho [S7]",
+     "A GN=AAA PE=1",
+     [("P12345", "S", 15, "AAA")]),
+    # a malformed block with an accession still takes its protein's place in the descriptions
+    ("P12345 1xPhospho [S15]; Q67890 Phospho; R11111 1xPhospho [S7]",
+     "A GN=AAA; B GN=BBB; C GN=CCC",
+     [("P12345", "S", 15, "AAA"), ("R11111", "S", 7, "CCC")]),
+    # a description without GN does not shift the other proteins' genes
+    ("P12345 1xPhospho [S15]; Q67890 1xPhospho [S7]",
+     "A no gene name PE=1; B GN=BBB PE=1",
+     [("P12345", "S", 15, "gene"), ("Q67890", "S", 7, "BBB")]),
+    ("P12345 1xPhospho [S15]; Q67890 1xPhospho [S7]",
+     "A GN=AAA PE=1",
+     [("P12345", "S", 15, "AAA"), ("Q67890", "S", 7, "gene")]),
+])
+def test_multiple_proteins(mod_str, desc_str, expected):
+    assert sites(mod_str, desc_str) == expected
+
+
+def test_mod_types_none_keeps_every_type():
+    assert sites("P12345 1xAcetyl [K5]; 1xPhospho [S15]", mod_types=None) == [
+        ("P12345", "K", 5, "AAA"), ("P12345", "S", 15, "AAA")
+    ]
+
+
+def test_missing_fields():
+    assert sites(None) == []
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from utils.process_output import filter_motif
+from utils.window_index import build_window_index, motif_mask, position_mask
+
+
+@pytest.fixture
+def gps_rows():
+    return pd.DataFrame({
+        # centered 21-mer, S at index 10
+        "Peptide": ["AAAAAAAAAASPAAAAAAAAA", "MKSPEELAAAAAA", "AAAAAAAAAASAAAAAAAAAA", "AAAAAAAAAASPAA"],
+        # left-truncated window, S at index 2; right-truncated window, S at index 10
+        "Position": [11, 3, 11, 11],
+    })
+
+
+def test_windows_are_aligned_on_their_own_center(gps_rows):
+    index = build_window_index(gps_rows["Peptide"], gps_rows["Position"] - 1)
+    assert position_mask(index, 1, "P").tolist() == [True, True, False, True]
+    assert position_mask(index, 0, "S").tolist() == [True, True, True, True]
+    # residues before the start of a left-truncated window are padding, never matches
+    assert position_mask(index, -3, "A").tolist() == [True, False, True, True]
+
+
+def test_motif_anchored_and_anywhere(gps_rows):
+    index = build_window_index(gps_rows["Peptide"], gps_rows["Position"] - 1)
+    assert motif_mask(index, "[ST]P", offset=0).tolist() == [True, True, False, True]
+    assert motif_mask(index, "SPEE").tolist() == [False, True, False, False]
+
+
+def test_duplicate_peptides_with_different_centers():
+    index = build_window_index(["AAAAAAAAAASPAAAAAAAAA"] * 2, [10, 11])
+    assert position_mask(index, 0, "S").tolist() == [True, False]
+    assert position_mask(index, 0, "P").tolist() == [False, True]
+
+
+def test_filter_motif_returns_diagnostics(gps_rows):
+    filtered, diagnostics = filter_motif(gps_rows, "P", offset=1)
+    assert diagnostics == []
+    assert filtered.index.tolist() == [0, 1, 3]
+
+    unchanged, diagnostics = filter_motif(gps_rows, "S?P")
+    assert unchanged is gps_rows
+    assert diagnostics
+
+    _, diagnostics = filter_motif(gps_rows, "SP", offset=10)
+    assert diagnostics
+
+    stale = build_window_index(gps_rows["Peptide"].iloc[:2], gps_rows["Position"].iloc[:2] - 1)
+    unchanged, diagnostics = filter_motif(gps_rows, "P", offset=1, index=stale)
+    assert unchanged is gps_rows
+    assert diagnostics
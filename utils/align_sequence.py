@@ -31,10 +31,17 @@ def align_peptide_sequence(df):
     - df (pd.DataFrame): Dataframe containing the new extracted sequence as a column.
     """
 
-    def apply_fn(row):
-        extracted, rel_pos = extract_surrounding_sequence(row['sequence'], row['position'])
-        return pd.Series({'extracted_sequence': extracted, 'center_index': rel_pos})
-
     df_out = df.copy()
-    df_out[['extracted_sequence', 'center_index']] = df_out.apply(apply_fn, axis=1)
+    extracted_sequences = pd.Series(index=df_out.index, dtype=object)
+    center_indices = pd.Series(index=df_out.index, dtype=object)
+
+    # every site on a protein shares the same sequence, so it is looked up once per protein
+    for _accession, group in df_out.groupby('accession', sort=False):
+        sequence = group['sequence'].iat[0]
+        windows = [extract_surrounding_sequence(sequence, position) for position in group['position']]
+        extracted_sequences[group.index] = [extracted for extracted, _rel_pos in windows]
+        center_indices[group.index] = [rel_pos for _extracted, rel_pos in windows]
+
+    df_out['extracted_sequence'] = extracted_sequences
+    df_out['center_index'] = center_indices.astype(int)
     return df_out
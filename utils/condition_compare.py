@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+
+DEFAULT_GROUP_COLS = ("Kinase_Group", "Kinase_Subgroup", "Kinase")
+
+
+def new_comparison():
+    """
+    Creates an empty comparison: a mapping of group column -> {condition: per-kinase counts}.
+    """
+    return {"counts": {}, "keys": {}}
+
+
+def is_cached(comparison, condition, key):
+    """
+    Returns True if the counts stored for `condition` were computed from the data identified by `key`,
+    so callers can skip selecting that condition's rows.
+    """
+    return key is not None and condition in comparison["keys"] and comparison["keys"][condition] == key
+
+
+def add_condition(comparison, condition, df, group_cols=DEFAULT_GROUP_COLS, key=None):
+    """
+    Adds (or replaces) the per-kinase counts of a single condition. Other conditions are left untouched,
+    so adding a condition only costs one pass over that condition's rows.
+
+    Parameters:
+    - comparison (dict): Comparison created by `new_comparison`.
+    - condition (str): Label of the condition, e.g. "control" or "treatment_2h".
+    - df (pd.DataFrame): Processed GPS output for this condition (after `split_kinase_hierarchy`).
+    - group_cols (iterable of str): Kinase grouping columns to count.
+    - key (hashable, optional): Identifies the data behind the condition. If it matches the key stored
+      for the condition, the cached counts are kept and `df` is not scanned.
+
+    Returns:
+    - comparison (dict): The updated comparison.
+    """
+    if is_cached(comparison, condition, key):
+        return comparison
+
+    for group_col in group_cols:
+        if group_col not in df.columns:
+            continue
+        comparison["counts"].setdefault(group_col, {})[condition] = df[group_col].value_counts()
+    comparison["keys"][condition] = key
+    return comparison
+
+
+def remove_condition(comparison, condition):
+    """
+    Drops a condition and its cached counts from the comparison.
+    """
+    for counts in comparison["counts"].values():
+        counts.pop(condition, None)
+    comparison["keys"].pop(condition, None)
+    return comparison
+
+
+def count_matrix(comparison, group_col="Kinase_Group"):
+    """
+    Assembles the kinase-by-condition count matrix from the cached per-condition counts.
+
+    Returns:
+    - matrix (pd.DataFrame): Integer counts indexed by kinase (group), one column per condition.
+    """
+    counts = comparison["counts"].get(group_col, {})
+    if not counts:
+        return pd.DataFrame()
+    matrix = pd.concat(counts, axis=1).fillna(0).astype(int)
+    matrix.index.name = group_col
+    return matrix
+
+
+def benjamini_hochberg(p_values):
+    """
+    Helper function applying the Benjamini-Hochberg correction to an array of p-values.
+    """
+    p_values = np.asarray(p_values, dtype=float)
+    n = len(p_values)
+    if n == 0:
+        return p_values
+    order = np.argsort(p_values)
+    ranked = p_values[order] * n / np.arange(1, n + 1)
+    ranked = np.minimum.accumulate(ranked[::-1])[::-1]
+    q_values = np.empty(n)
+    q_values[order] = np.minimum(ranked, 1.0)
+    return q_values
+
+
+def enrichment_stats(matrix, reference=None):
+    """
+    Computes kinase enrichment for every kinase and condition at once.
+
+    Each cell is tested with a one-sided hypergeometric test (equivalent to a one-sided Fisher's exact
+    test on the 2x2 table of kinase vs. other kinases and condition vs. background). The background is
+    every other condition, or only the `reference` condition (e.g. the control) if it is given.
+
+    Parameters:
+    - matrix (pd.DataFrame): Count matrix from `count_matrix`.
+    - reference (str, optional): Condition to compare every other condition against.
+
+    Returns:
+    - stats (pd.DataFrame): One row per kinase and condition with the columns 'count', 'expected',
+      'fold_enrichment', 'odds_ratio', 'p_value' and 'q_value' (Benjamini-Hochberg).
+    """
+    # scipy is only loaded once statistics are actually requested
+    from scipy.stats import hypergeom
+
+    counts = matrix.to_numpy(dtype=float)
+    col_totals = counts.sum(axis=0)
+    if reference is None:
+        conditions = list(matrix.columns)
+        a = counts
+        bg = counts.sum(axis=1, keepdims=True) - counts
+        bg_totals = col_totals.sum() - col_totals
+    else:
+        conditions = [col for col in matrix.columns if col != reference]
+        ref = matrix.columns.get_loc(reference)
+        a = counts[:, [matrix.columns.get_loc(col) for col in conditions]]
+        bg = np.repeat(counts[:, [ref]], len(conditions), axis=1)
+        bg_totals = np.repeat(col_totals[ref], len(conditions))
+
+    n = a.sum(axis=0)
+    b = n - a
+    d = bg_totals - bg
+    total = n + bg_totals
+    kinase_total = a + bg
+
+    expected = kinase_total * n / np.where(total == 0, np.nan, total)
+    p_values = hypergeom.sf(a - 1, total, kinase_total, n)
+    # Haldane correction keeps the odds ratio finite when a cell is empty
+    odds_ratio = ((a + 0.5) * (d + 0.5)) / ((b + 0.5) * (bg + 0.5))
+
+    stats = pd.DataFrame({
+        matrix.index.name or "kinase": np.repeat(matrix.index.to_numpy(), len(conditions)),
+        "condition": np.tile(conditions, len(matrix.index)),
+        "count": a.ravel().astype(int),
+        "expected": expected.ravel(),
+        "fold_enrichment": (a / np.where(expected == 0, np.nan, expected)).ravel(),
+        "odds_ratio": odds_ratio.ravel(),
+        "p_value": p_values.ravel(),
+    })
+    stats["q_value"] = benjamini_hochberg(stats["p_value"].fillna(1.0))
+    return stats.sort_values("p_value").reset_index(drop=True)
@@ -1,7 +1,27 @@
-import streamlit as st
 import pandas as pd
-from io import StringIO, BytesIO
-import csv
+from io import BytesIO
+import json
+import os
+import zipfile
+
+DEFAULT_SHARD_SIZE = 1000
+MANIFEST_NAME = "manifest.json"
+
+
+def gps_fasta_records(df):
+    """
+    Builds the GPS FASTA record for every row at once with column-wise string operations.
+
+    Returns:
+    - records (pd.Series): One ">gene|Center = #\n[extracted_sequence]\n" string per row.
+    """
+    return (
+        ">" + df['gene_name'].astype(str)
+        + "|Center = " + df['center_index'].astype(str)
+        + "\n" + df['extracted_sequence'].astype(str) + "\n"
+    )
+
+
 def generate_gps_input(df):
     """
     Generates GPS input format from mass spectrometry data.
@@ -18,11 +38,54 @@ def generate_gps_input(df):
     Returns:
     - A string or file content suitable for input to GPS prediction tools.
     """
-    fasta_buffer = StringIO()
-    for _, row in df.iterrows():
-        fasta_buffer.write(f">{row['gene_name']}|Center = {row['center_index']}\n")
-        fasta_buffer.write(f"{row['extracted_sequence']}\n")
-    return fasta_buffer.getvalue()
+    return "".join(gps_fasta_records(df))
+
+
+def write_gps_input(df, dest, chunk_size=10000):
+    """
+    Streams the GPS input for `df` to a path or a writable text file object, `chunk_size` records at a time.
+    """
+    if isinstance(dest, (str, os.PathLike)):
+        with open(dest, "w") as f:
+            return write_gps_input(df, f, chunk_size)
+    for start in range(0, len(df), chunk_size):
+        dest.write("".join(gps_fasta_records(df.iloc[start:start + chunk_size])))
+
+
+def generate_gps_input_shards(df, shard_size=DEFAULT_SHARD_SIZE, prefix="gps_input"):
+    """
+    Splits the GPS input into parts of at most `shard_size` sequences to stay under GPS submission limits.
+
+    Every header in a part is tagged with its part number (`>gene|Center = #|Shard = N`), since
+    `gene|Center = 10` headers alone rarely tell parts apart; `process_custom_csv` ignores the tag.
+    The parts are zipped together with a manifest listing, in order, each part's number, file name and
+    number of sequences. `process_output.order_shard_files` reads the tag back from the GPS output of
+    every part to put them in the original order.
+
+    Returns:
+    - output (BytesIO): Zip archive containing the parts and `manifest.json`.
+    """
+    records = gps_fasta_records(df)
+    n_shards = max(1, -(-len(records) // shard_size))
+    manifest = {"shard_size": shard_size, "total_sequences": len(records), "shards": []}
+
+    output = BytesIO()
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for i in range(n_shards):
+            shard = records.iloc[i * shard_size:(i + 1) * shard_size].str.replace(
+                "\n", f"|Shard = {i + 1}\n", n=1, regex=False
+            )
+            file_name = f"{prefix}_part{i + 1:03d}.txt"
+            with zf.open(file_name, "w") as f:
+                f.write("".join(shard).encode())
+            manifest["shards"].append({
+                "index": i + 1,
+                "file": file_name,
+                "n_sequences": len(shard),
+            })
+        zf.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2))
+    output.seek(0)
+    return output
 
 def prepare_excel_download(df, sheet_name="Sheet1"):
     """
@@ -0,0 +1,200 @@
+import inspect
+import multiprocessing
+import os
+import pickle
+import sqlite3
+import tempfile
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+JOB_DIR = os.environ.get("GPS_JOB_DIR", os.path.join(tempfile.gettempdir(), "gps_automation_jobs"))
+JOB_DB_PATH = os.path.join(JOB_DIR, "jobs.sqlite")
+MAX_WORKERS = int(os.environ.get("GPS_JOB_WORKERS", 2))
+# jobs (and their result pickles) older than this many seconds are pruned on submission
+MAX_JOB_AGE = float(os.environ.get("GPS_JOB_MAX_AGE", 24 * 60 * 60))
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_executor = None
+
+
+def _connect(db_path):
+    """
+    Helper function to open the job table, creating it on first use.
+    """
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            stage TEXT,
+            status TEXT,
+            progress REAL,
+            result_path TEXT,
+            error TEXT,
+            created REAL,
+            updated REAL
+        )
+    """)
+    return conn
+
+
+def _update_job(db_path, job_id, **fields):
+    fields["updated"] = time.time()
+    columns = ", ".join(f"{key} = ?" for key in fields)
+    with _connect(db_path) as conn:
+        conn.execute(f"UPDATE jobs SET {columns} WHERE job_id = ?", (*fields.values(), job_id))
+    conn.close()
+
+
+def update_progress(db_path, job_id, fraction):
+    """
+    Records the progress (0 to 1) of a running job. Passed to job functions as `progress_callback`.
+    """
+    _update_job(db_path, job_id, progress=min(max(float(fraction), 0.0), 1.0))
+
+
+def _run_job(db_path, job_id, fn, args, kwargs):
+    """
+    Runs a single job inside a worker process and stores its pickled result next to the job table.
+    """
+    _update_job(db_path, job_id, status=RUNNING)
+    try:
+        if "progress_callback" in inspect.signature(fn).parameters:
+            kwargs = dict(kwargs, progress_callback=partial(update_progress, db_path, job_id))
+        result = fn(*args, **kwargs)
+
+        result_path = os.path.join(os.path.dirname(db_path), f"{job_id}.pkl")
+        with open(result_path, "wb") as f:
+            pickle.dump(result, f)
+        _update_job(db_path, job_id, status=DONE, progress=1.0, result_path=result_path)
+    except Exception:
+        _update_job(db_path, job_id, status=FAILED, error=traceback.format_exc())
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # the streamlit server is multithreaded, so workers are spawned rather than forked
+        _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def submit_job(stage, fn, *args, db_path=JOB_DB_PATH, **kwargs):
+    """
+    Submits a pipeline stage to the local process pool.
+
+    Parameters:
+    - stage (str): Name of the pipeline stage, used for display.
+    - fn (callable): Module level function to run. If it accepts a `progress_callback` argument,
+      it is given one that records progress in the job table.
+    - *args, **kwargs: Arguments passed to `fn`. They must be picklable.
+    - db_path (str): Path of the SQLite job table.
+
+    Returns:
+    - job_id (str): Identifier used to poll the job and fetch its result.
+    """
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    with _connect(db_path) as conn:
+        conn.execute(
+            "INSERT INTO jobs (job_id, stage, status, progress, created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, stage, PENDING, 0.0, now, now),
+        )
+    conn.close()
+    executor = _get_executor()
+    try:
+        future = executor.submit(_run_job, db_path, job_id, fn, args, kwargs)
+    except BrokenProcessPool:
+        _reset_executor(executor)
+        executor = _get_executor()
+        future = executor.submit(_run_job, db_path, job_id, fn, args, kwargs)
+    future.add_done_callback(partial(_mark_crashed, db_path, job_id, executor))
+    prune_jobs(db_path=db_path)
+    return job_id
+
+
+def _reset_executor(broken):
+    """
+    Helper function that drops a broken pool, so the next submission starts a fresh one.
+    A pool that has already been replaced is left alone.
+    """
+    global _executor
+    if _executor is broken:
+        _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _mark_crashed(db_path, job_id, executor, future):
+    # _run_job records its own errors, so an exception here means the worker itself died
+    if future.cancelled():
+        _update_job(db_path, job_id, status=FAILED, error="Job was cancelled")
+    elif future.exception() is not None:
+        _update_job(db_path, job_id, status=FAILED, error=repr(future.exception()))
+        if isinstance(future.exception(), BrokenProcessPool):
+            _reset_executor(executor)
+
+
+def get_job(job_id, db_path=JOB_DB_PATH):
+    """
+    Returns the job table row for `job_id` as a dict, or None if the job is unknown.
+    """
+    with _connect(db_path) as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+def delete_job(job_id, db_path=JOB_DB_PATH):
+    """
+    Removes a job row and its result pickle, e.g. once the caller has cached the result.
+    """
+    job = get_job(job_id, db_path)
+    if job is None:
+        return
+    if job["result_path"] and os.path.exists(job["result_path"]):
+        os.remove(job["result_path"])
+    with _connect(db_path) as conn:
+        conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+    conn.close()
+
+
+def prune_jobs(max_age=MAX_JOB_AGE, db_path=JOB_DB_PATH):
+    """
+    Deletes jobs (and their result pickles) last updated more than `max_age` seconds ago. This includes
+    pending or running jobs, which are left behind when the server stops before their worker finishes.
+    """
+    cutoff = time.time() - max_age
+    with _connect(db_path) as conn:
+        rows = conn.execute("SELECT job_id, result_path FROM jobs WHERE updated < ?", (cutoff,)).fetchall()
+    conn.close()
+    for row in rows:
+        if row["result_path"] and os.path.exists(row["result_path"]):
+            os.remove(row["result_path"])
+    with _connect(db_path) as conn:
+        conn.executemany("DELETE FROM jobs WHERE job_id = ?", [(row["job_id"],) for row in rows])
+    conn.close()
+
+
+def fetch_result(job_id, db_path=JOB_DB_PATH):
+    """
+    Loads the result of a finished job.
+
+    Raises:
+    - RuntimeError: If the job has not finished successfully.
+    """
+    job = get_job(job_id, db_path)
+    if job is None or job["status"] != DONE:
+        status = job["status"] if job else "unknown"
+        raise RuntimeError(f"Job {job_id} has no result (status: {status})")
+    with open(job["result_path"], "rb") as f:
+        return pickle.load(f)
@@ -1,24 +1,32 @@
-import matplotlib.pyplot as plt
-import streamlit as st
 import numpy as np
-import plotly.express as px
-def plot_kinase_pie_chart(df, group_col, kinase_column="Kinase", pct=False, legend=False):
+# plotly and matplotlib are imported inside the plotting functions, so they are only loaded
+# when a chart is actually drawn
+
+
+def plot_kinase_pie_chart(df, group_col, kinase_column="Kinase", pct=False, legend=False, counts=None):
     """
-    Plots a pie chart of kinase classifications from a DataFrame and displays it in Streamlit.
+    Plots a pie chart of kinase classifications from a DataFrame.
+
+    If `counts` (a Series of row counts indexed by group, see `results_view.group_counts`) is given,
+    it is plotted directly and `df` is not scanned.
+
+    Returns:
+    - fig (plotly Figure or None): The pie chart, or None if there is nothing to plot.
+    - diagnostics (list of str): Reasons nothing was plotted, for the caller to report.
     """
 
-    if group_col not in df.columns:
-        st.warning(f"Column '{group_col}' not found in the data.")
-        return
+    if counts is None:
+        if group_col not in df.columns:
+            return None, [f"Column '{group_col}' not found in the data."]
+        counts = df[group_col].value_counts()
 
-    df_filtered = df.dropna(subset=[group_col]).copy()
-    group_counts = df_filtered[group_col].value_counts().reset_index()
-    group_counts.columns = [group_col, "count"]
-    n = len(df_filtered[group_col])
+    group_counts = counts.rename_axis(group_col).reset_index(name="count")
+    n = int(group_counts["count"].sum())
 
     if group_counts.empty:
-        st.warning("No data available for the selected kinase group.")
-        return
+        return None, ["No data available for the selected kinase group."]
+
+    import plotly.express as px
 
     fig = px.pie(
         group_counts,
@@ -35,9 +43,7 @@ def plot_kinase_pie_chart(df, group_col, kinase_column="Kinase", pct=False, lege
         hover += "<br>percent=%{percent:.2%}"
     hover += "<extra></extra>"
     fig.update_traces(hovertemplate=hover)
-
-    st.subheader(f"{group_col} Distribution")
-    st.plotly_chart(fig)
+    return fig, []
     # fig, ax = plt.subplots()
     # wedges, texts, autotexts = ax.pie(
     #     group_counts,
@@ -108,6 +114,8 @@ def percent_contour(df, abs_col='abs_diff', rel_col='rel_diff',
     X, Y = np.meshgrid(xe[:-1], ye[:-1], indexing='ij')
 
     # --- plot contours for given % levels ---
+    import matplotlib.pyplot as plt
+
     fig, ax = plt.subplots()
     cs = ax.contour(X, Y, Z, levels=levels)
     ax.clabel(cs, inline=True, fmt="%.0f%%")
@@ -1,12 +1,17 @@
 import pandas as pd
-import streamlit as st
+import csv
+import io
+import os
+import re
+import utils.window_index as window_index
 
-def process_custom_csv(df):
+def process_custom_csv(df, progress_callback=None):
     """
     Processes the output of GPS(Group Based Prediction System) for kinase prediction
 
     Parameters:
     - df (pd.DataFrame): DataFrame containing Kinase prediction data
+    - progress_callback (callable, optional): Called periodically with the fraction of rows processed.
 
     Returns:
     - processed_df (pd.DataFrame): A cleaned dataframe where the genes have been exploded into its own column and filtered for modifications that match the relative center position.
@@ -14,7 +19,10 @@ def process_custom_csv(df):
     current_gene = None
     output_rows = []
 
-    for _, row in df.iterrows():
+    n_rows = len(df)
+    for i, (_, row) in enumerate(df.iterrows()):
+        if progress_callback and i % 10000 == 0:
+            progress_callback(i / n_rows)
         first_col = str(row.iloc[0])
         if first_col.startswith(">"):
             header = first_col.lstrip(">")
@@ -32,19 +40,108 @@ def process_custom_csv(df):
             except (KeyError, ValueError, TypeError):
                 continue 
     processed_df = pd.DataFrame(output_rows)
-    processed_df.sort_values(by="Gene", inplace=True)
+    # stable, so rows of the same gene keep their input (e.g. shard) order
+    processed_df.sort_values(by="Gene", kind="stable", inplace=True)
     processed_df.reset_index(drop=True, inplace=True)
     return processed_df
 
 
+def read_and_process_csv(file, progress_callback=None):
+    """
+    Reads a GPS output CSV (path or file-like object), or a list of them such as the ordered outputs of
+    a sharded submission, and processes it with `process_custom_csv`.
+    Used to run the parsing stage as a background job.
+    """
+    if isinstance(file, list):
+        # the column header row is only repeated once per file, so the shards concatenate cleanly
+        df = pd.concat([pd.read_csv(f) for f in file], ignore_index=True)
+    else:
+        df = pd.read_csv(file)
+    return process_custom_csv(df, progress_callback)
+
+
+SHARD_TAG_PATTERN = re.compile(r"\|Shard = (\d+)\b")
+
+
+def read_shard_number(file):
+    """
+    Helper function returning the shard number tagged in the first `>gene|Center = #|Shard = N` header
+    of a GPS output CSV (path or binary file-like object), or None if it has no tagged header.
+    Only the lines up to that header are read.
+    """
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as f:
+            return read_shard_number(f)
+    start = file.tell()
+    file.seek(0)
+    text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+    try:
+        for row in csv.reader(text):
+            if row and row[0].startswith(">"):
+                match = SHARD_TAG_PATTERN.search(row[0])
+                if match:
+                    return int(match.group(1))
+        return None
+    finally:
+        # detach so the wrapper does not close the underlying file
+        text.detach()
+        file.seek(start)
+
+
+def order_shard_files(files, manifest):
+    """
+    Orders the GPS output files of a sharded submission using the manifest written alongside the shards
+    (see `format_gps_entry.generate_gps_input_shards`).
+
+    Each output file is matched to its shard by the `Shard = N` tag in its FASTA headers, so files can be
+    renamed (e.g. `download (1).csv`) and GPS may leave out sequences without predictions.
+
+    Parameters:
+    - files (list): GPS output CSV files (binary file-like objects with a `name` attribute).
+    - manifest (dict): Parsed manifest.json.
+
+    Returns:
+    - ordered_files (list): The matched files in shard order; concatenated, they can be passed to
+      `process_custom_csv` as a single GPS output.
+    - missing (list of str): Shard file names with no matching output file.
+    - unmatched (list): Files without a shard tag, or whose tag is not in the manifest or was already
+      matched by another file.
+    """
+    files_by_shard = {}
+    unmatched = []
+    for file in files:
+        shard_number = read_shard_number(file)
+        if shard_number is None or shard_number in files_by_shard:
+            unmatched.append(file)
+        else:
+            files_by_shard[shard_number] = file
+
+    ordered_files = []
+    missing = []
+    for shard in sorted(manifest["shards"], key=lambda shard: shard["index"]):
+        if shard["index"] in files_by_shard:
+            ordered_files.append(files_by_shard.pop(shard["index"]))
+        else:
+            missing.append(shard["file"])
+    # tags that are not in the manifest belong to another submission
+    unmatched.extend(files_by_shard.values())
+    return ordered_files, missing, unmatched
+
+
 def filter_output(df, absolute_cutoff, relative_cutoff):
+    """
+    Filters predictions on the absolute (Score - Cutoff) and relative ((Score - Cutoff) / (1 - Cutoff)) differences.
+
+    Returns:
+    - df (pd.DataFrame): The filtered dataframe, or the input unchanged if it cannot be filtered.
+    - diagnostics (list of str): Problems encountered, for the caller to report.
+    """
     if 'Score' in df.columns and 'Cutoff' in df.columns:
         df['abs_diff'] = df['Score'] - df['Cutoff']
         df['rel_diff'] = (df['Score'] - df['Cutoff']) / (1 - df['Cutoff'])
-        return df[(df['abs_diff'] > absolute_cutoff) & (df['rel_diff'] > relative_cutoff)]
+        return df[(df['abs_diff'] > absolute_cutoff) & (df['rel_diff'] > relative_cutoff)], []
     else:
-        st.error("No score and cutoff columns in final output!")
-        return df
+        return df, ["No score and cutoff columns in final output!"]
     
 
 def filter_top_kinase_mod(df, k):
@@ -53,3 +150,28 @@ def filter_top_kinase_mod(df, k):
         lambda x: x.nlargest(k).min()
     )
     return df_sorted[df_sorted["Score"] >= kth_scores]
+
+
+def filter_motif(df, motif, offset=None, index=None, peptide_col="Peptide", position_col="Position"):
+    """
+    Keeps the rows whose peptide window matches `motif` (see `window_index.motif_mask`), optionally
+    anchored at `offset` from the modified residue. Windows are aligned on `position_col` (one-based,
+    as in the GPS output) when it is present.
+
+    Passing an `index` built with `window_index.build_window_index` on the same dataframe lets
+    repeated queries skip rebuilding it.
+
+    Returns:
+    - df (pd.DataFrame): The matching rows, or the input unchanged if the motif cannot be applied.
+    - diagnostics (list of str): Problems encountered, for the caller to report.
+    """
+    if index is None:
+        centers = df[position_col] - 1 if position_col in df.columns else None
+        index = window_index.build_window_index(df[peptide_col], centers)
+    elif len(index["row_ids"]) != len(df):
+        return df, [f"The motif index covers {len(index['row_ids'])} rows but the data has {len(df)}; rebuild the index"]
+    try:
+        mask = window_index.motif_mask(index, motif, offset)
+    except ValueError as e:
+        return df, [str(e)]
+    return df[mask], []
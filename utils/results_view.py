@@ -0,0 +1,81 @@
+import math
+import pandas as pd
+
+SEQUENCE_COLUMNS = ("sequence",)
+
+
+def page_count(n_rows, page_size):
+    """
+    Helper function returning the number of pages needed to show `n_rows` rows (at least 1).
+    """
+    return max(1, math.ceil(n_rows / page_size))
+
+
+def truncate_sequences(df, max_len=30, columns=SEQUENCE_COLUMNS):
+    """
+    Shortens long sequence strings for display, appending the full length.
+
+    Parameters:
+    - df (pd.DataFrame): Dataframe to display. It is not modified.
+    - max_len (int): Number of residues kept from the start of each sequence.
+    - columns (iterable of str): Columns to truncate, if present.
+
+    Returns:
+    - df (pd.DataFrame): Copy of the dataframe with truncated sequence columns.
+    """
+    df = df.copy()
+    for col in columns:
+        if col not in df.columns:
+            continue
+        seqs = df[col].astype("string")
+        lengths = seqs.str.len()
+        long = lengths > max_len
+        df[col] = seqs.where(~long, seqs.str.slice(0, max_len) + "... (" + lengths.astype("string") + " aa)")
+    return df
+
+
+def get_page(df, page, page_size, columns=None, max_seq_len=30):
+    """
+    Selects a single page of a dataframe for display, so only the visible rows are sent to the browser.
+
+    Parameters:
+    - df (pd.DataFrame): Full results dataframe.
+    - page (int): Zero-based page number.
+    - page_size (int): Number of rows per page.
+    - columns (list of str, optional): Columns to keep. All columns are kept if None.
+    - max_seq_len (int): Length that sequence columns are truncated to.
+
+    Returns:
+    - page_df (pd.DataFrame): The projected, truncated page.
+    """
+    start = page * page_size
+    page_df = df.iloc[start:start + page_size]
+    if columns is not None:
+        page_df = page_df[[col for col in columns if col in page_df.columns]]
+    return truncate_sequences(page_df, max_seq_len)
+
+
+def downsample(df, max_rows, columns=None, random_state=0):
+    """
+    Returns at most `max_rows` randomly sampled rows (optionally projected to `columns`) for plotting.
+    Sampling is uniform, so distributions and percentages are preserved.
+    """
+    if columns is not None:
+        df = df[[col for col in columns if col in df.columns]]
+    if len(df) <= max_rows:
+        return df
+    return df.sample(n=max_rows, random_state=random_state)
+
+
+def group_counts(df, group_cols):
+    """
+    Pre-aggregates the number of rows per group, e.g. per kinase group and subgroup.
+
+    Parameters:
+    - df (pd.DataFrame): Dataframe containing the grouping columns.
+    - group_cols (str or list of str): Column(s) to group by. Rows with missing values are dropped.
+
+    Returns:
+    - counts (pd.Series): Row counts indexed by group, largest first.
+    """
+    return df.groupby(group_cols).size().sort_values(ascending=False)
@@ -3,44 +3,116 @@ import re
 
 
 
-def parse_modifications(row):
+# One block per modification type, e.g. "P12345-2 2xPhospho [S15(99.1); T20]". The accession is
+# only written before the first block of each protein, so later blocks inherit it.
+MOD_BLOCK_PATTERN = re.compile(
+    r"^(?:(?P<accession>[A-Za-z0-9]+(?:-\d+)?)\s+)?\d+x(?P<modification>[^\s\[]+)\s+\[(?P<sites>[^\]]*)\]$"
+)
+# Looser match for the accession at the start of a block, so malformed blocks still count as a protein.
+# Accessions contain a digit and are never directly followed by a site list (unlike "Phospho [S7]").
+ACCESSION_PREFIX_PATTERN = re.compile(r"^(?P<accession>[A-Za-z][A-Za-z]*\d[A-Za-z0-9]*(?:-\d+)?)\s+(?![\s\[])")
+REQUIRED_COLUMNS = {"Master Protein Descriptions", "Modifications in Master Proteins", "Annotated Sequence"}
+SITE_PATTERN = re.compile(r"(?P<residue>[A-Z])(?P<position>\d+)(?:\((?P<conf>[\d.]+)\))?")
+
+
+def canonical_accession(accession):
+    """
+    Helper function that strips the isoform suffix from a UniProt accession (e.g. P12345-2 -> P12345).
+    """
+    return accession.split("-")[0]
+
+
+def split_outside_brackets(text, sep=";"):
+    """
+    Helper function that splits `text` on `sep`, ignoring separators inside [...] site lists.
+    """
+    parts = []
+    depth = 0
+    current = []
+    for char in text:
+        if char == "[":
+            depth += 1
+        elif char == "]":
+            depth = max(depth - 1, 0)
+        if char == sep and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current).strip())
+    return [part for part in parts if part]
+
+
+def parse_modifications(row, mod_types=("Phospho",)):
+    """
+    Expands a single DataFrame row into one entry per modified site.
+
+    Handles multiple master proteins (semicolon separated), isoform accessions such as P12345-2,
+    and several modification types in the same entry, e.g.:
+        "P12345-2 1xAcetyl [K5]; 2xPhospho [S15(99.1); T20]; Q67890 1xPhospho [Y7(100)]"
+
+    A block that cannot be parsed resets the current protein, so the blocks after it are skipped
+    until the next accession rather than being attributed to the previous protein. If the malformed
+    block starts with an accession, that protein still counts when matching proteins to gene names.
+
+    Parameters:
+    - row (pd.Series): Row containing "Modifications in Master Proteins" and "Master Protein Descriptions".
+    - mod_types (iterable of str or None): Modification types to keep. None keeps every type.
+
+    Returns:
+    - parsed (list of dict): One dict per site with the keys 'accession', 'canonical_accession',
+      'modification', 'residue', 'position', 'confidence' and 'gene_name'.
+    """
     mod_str = row["Modifications in Master Proteins"]
     desc_str = row["Master Protein Descriptions"]
 
     if not isinstance(mod_str, str) or not isinstance(desc_str, str):
         return []
 
-    match = re.match(r"^(?P<accession>\w+)\s\d+xPhospho\s+\[(?P<sites>[^\]]+)\]", mod_str)
-    if not match:
-        return []
-
-    accession = match.group("accession")
-    sites_str = match.group("sites")
-
-    gene_match = re.search(r"GN=([\w\-\.]+)", desc_str)
-    gene_name = gene_match.group(1) if gene_match else "gene"
+    # descriptions are listed in the same order as the master proteins
+    gene_names = []
+    for description in split_outside_brackets(desc_str):
+        gene_match = re.search(r"GN=([\w\-\.]+)", description)
+        gene_names.append(gene_match.group(1) if gene_match else "gene")
+    protein_order = []
 
     parsed = []
-    for site in sites_str.split(";"):
-        site = site.strip()
-        
-        site_match = re.match(r"(?P<residue>[A-Z])(?P<position>\d+)\((?P<conf>[\d.]+)\)", site)
-        if site_match:
-            confidence = float(site_match.group("conf"))
-        else:
-            site_match = re.match(r"(?P<residue>[A-Z])(?P<position>\d+)", site)
-            if site_match:
-                confidence = None
-            else:
-                continue 
-
-        parsed.append({
-            "accession": accession,
-            "residue": site_match.group("residue"),
-            "position": int(site_match.group("position")),
-            "confidence": confidence,
-            "gene_name": gene_name
-        })
+    accession = None
+    for block_str in split_outside_brackets(mod_str):
+        block = MOD_BLOCK_PATTERN.match(block_str)
+        prefix = block or ACCESSION_PREFIX_PATTERN.match(block_str)
+        if prefix and prefix.group("accession") and prefix.group("accession") not in protein_order:
+            protein_order.append(prefix.group("accession"))
+        if not block:
+            accession = None
+            continue
+        if block.group("accession"):
+            accession = block.group("accession")
+        if accession is None:
+            continue
+
+        modification = block.group("modification")
+        if mod_types is not None and modification not in mod_types:
+            continue
+
+        protein_index = protein_order.index(accession)
+        gene_name = gene_names[protein_index] if protein_index < len(gene_names) else "gene"
+        for site in block.group("sites").split(";"):
+            site_match = SITE_PATTERN.fullmatch(site.strip())
+            if not site_match:
+                # e.g. "N-Term" or an ambiguous residue
+                continue
+
+            conf = site_match.group("conf")
+            parsed.append({
+                "accession": accession,
+                "canonical_accession": canonical_accession(accession),
+                "modification": modification,
+                "residue": site_match.group("residue"),
+                "position": int(site_match.group("position")),
+                "confidence": float(conf) if conf is not None else None,
+                "gene_name": gene_name
+            })
 
     return parsed
 
@@ -120,6 +192,8 @@ def generate_cleaned_df(all_entries):
     - pd.DataFrame
         A flat DataFrame containing one row per phospho-site entry, with columns:
         - 'accession'
+        - 'canonical_accession'
+        - 'modification'
         - 'residue'
         - 'position'
         - 'confidence'
@@ -128,4 +202,26 @@ def generate_cleaned_df(all_entries):
     flat_entries = [item for sublist in all_entries for item in sublist]
     parsed_df = pd.DataFrame(flat_entries)
     return parsed_df
-    
+
+
+def read_mass_spec_file(file, mod_types=("Phospho",)):
+    """
+    Reads a mass spectrometry Excel export and expands it into one row per modified site.
+    Used to run the read and parse stage as a background job.
+
+    Parameters:
+    - file (str or file-like): The Excel file.
+    - mod_types (iterable of str or None): Modification types to keep, see `parse_modifications`.
+
+    Returns:
+    - df (pd.DataFrame): Input rows that have a "Modifications in Master Proteins" entry.
+    - parsed_df (pd.DataFrame): One row per modified site, see `generate_cleaned_df`.
+    - diagnostics (list of str): Problems that prevented parsing, for the caller to report.
+    """
+    df = pd.read_excel(file)
+    if not REQUIRED_COLUMNS.issubset(df.columns):
+        return df, pd.DataFrame(), [f"Input file must contain the following columns: {REQUIRED_COLUMNS}"]
+
+    df = df.dropna(subset=["Modifications in Master Proteins"]).copy()
+    all_entries = df.apply(parse_modifications, axis=1, mod_types=mod_types)
+    return df, generate_cleaned_df(all_entries), []
@@ -1,5 +1,3 @@
-import pandas as pd
-import requests
 import re
 def chunk_list(lst, size):
     """
@@ -9,9 +7,9 @@ def chunk_list(lst, size):
 
 def extract_accession(header):
     """
-    Helper function to extract protein accession from a header.
+    Helper function to extract protein accession from a header, keeping isoform suffixes (e.g. P12345-2).
     """
-    match = re.match(r'(?:\w+\|)?(\w+)\|?', header)
+    match = re.match(r'(?:\w+\|)?([\w\-]+)\|?', header)
     return match.group(1) if match else None
 
 def parse_fasta_entry(entry):
@@ -34,38 +32,49 @@ def parse_fasta_entry(entry):
     return accession, sequence
 
 
-def query_full_seq(df):
+def query_full_seq(df, progress_callback=None):
     """
     Queries UniProt’s REST API to fetch full amino acid sequences for accessions
     found in the input DataFrame. Requests are made in chunks of 100 accessions.
+    Accessions are collapsed to their canonical protein so each protein is requested once,
+    with its isoforms included whenever an isoform accession (e.g. P12345-2) is present.
 
     Parameters:
     - df (pd.DataFrame): DataFrame containing a column named 'accession'
+    - progress_callback (callable, optional): Called with the fraction of chunks fetched so far.
 
     Returns:
     - all_fasta_data (List[str]): List of FASTA-formatted response strings
     """
+    import requests
+
     accession_list = df['accession'].to_list()
-    unique_accessions = list(set(accession_list))
+    unique_accessions = list(set(acc.split("-")[0] for acc in accession_list))
+    isoform_proteins = set(acc.split("-")[0] for acc in accession_list if "-" in acc)
     
     query_string = ""
     chunks = chunk_list(unique_accessions, 100)
 
     all_fasta_data = []
 
-    for chunk in chunks: 
+    for i, chunk in enumerate(chunks): 
         query_string = " OR ".join(f"accession:{acc}" for acc in chunk)
         url = "https://rest.uniprot.org/uniprotkb/stream"
         params = {
         "format": "fasta",
         "query": query_string 
         }
+        if isoform_proteins.intersection(chunk):
+            # isoform sequences are only returned when explicitly asked for
+            params["includeIsoform"] = "true"
         response = requests.get(url, params=params)
         if response.status_code == 200:
             fasta_data = response.text
             all_fasta_data.append(fasta_data)
         else:
             print("request failed with status code:", response.status_code)
+        if progress_callback:
+            progress_callback((i + 1) / len(chunks))
 
     return all_fasta_data
 
@@ -108,6 +117,8 @@ def req_obsolete_accessions(unique_accessions, entries):
     Returns:
     - missing_fasta_dict (dict): Mapping of missing accession → (new_accession, sequence) tuples
     """
+    import requests
+
     returned_accessions = []
 
     for entry in entries:
@@ -129,7 +140,7 @@ def req_obsolete_accessions(unique_accessions, entries):
             print("request failed with status code:", response.status_code)
     return missing_fasta_dict
 
-def fetch_all_sequences(original_df):
+def fetch_all_sequences(original_df, progress_callback=None):
     """
     Fetches full amino acid sequences for all UniProt accessions in the input DataFrame.
 
@@ -141,6 +152,7 @@ def fetch_all_sequences(original_df):
 
     Parameters:
     - original_df (pd.DataFrame): DataFrame with an 'accession' column containing UniProt IDs
+    - progress_callback (callable, optional): Called with the fraction of batched queries completed
 
     Returns:
     - updated_df (pd.DataFrame): Input DataFrame with an added 'sequence' column
@@ -148,7 +160,7 @@ def fetch_all_sequences(original_df):
                                  mapping to (new_accession, sequence)
     - fasta_dict (dict): All successfully retrieved accession to sequence mappings
     """
-    all_fasta_data = query_full_seq(original_df)
+    all_fasta_data = query_full_seq(original_df, progress_callback)
     fasta_dict, entries  =  process_fasta_data(all_fasta_data)
     missing_fasta_dict = {}
 
@@ -0,0 +1,144 @@
+import re
+import numpy as np
+import pandas as pd
+
+WINDOW_WIDTH = 21
+PAD_CHAR = "-"
+WILDCARDS = {".", "x", "X"}
+
+
+def build_window_index(peptides, centers=None, width=WINDOW_WIDTH):
+    """
+    Builds a positional index over sequence windows (e.g. the GPS `Peptide` column).
+
+    Each window is aligned on its own modified residue: windows cut short at a protein end (see
+    `align_sequence.extract_surrounding_sequence`) are padded with '-' on the left or right so the
+    modified residue always sits at index width // 2. Windows are deduplicated first, since the same
+    peptide appears once per predicted kinase, and stored as a (n_unique, width) uint8 matrix of
+    residues. Per-position, per-residue bitmaps are built lazily and cached by the queries.
+
+    Parameters:
+    - peptides (pd.Series or list of str): Sequence windows.
+    - centers (pd.Series or list of int, optional): Zero-based index of the modified residue in each
+      window (GPS `Position` - 1). If None, every window is assumed to be centered.
+    - width (int): Width of the aligned windows.
+
+    Returns:
+    - index (dict): The index, to be passed to `position_mask` and `motif_mask`.
+    """
+    half = width // 2
+    peptides = pd.Series(peptides, dtype=object).fillna("").astype(str).reset_index(drop=True)
+    if centers is None:
+        centers = pd.Series(half, index=peptides.index)
+    else:
+        centers = pd.to_numeric(pd.Series(centers).reset_index(drop=True), errors="coerce")
+    # rows without a usable center get an all-padding window that never matches
+    valid = centers.notna() & (centers >= 0) & (centers < peptides.str.len())
+    centers = centers.where(valid, -1).astype(np.int64)
+
+    peptide_ids, unique_peptides = pd.factorize(peptides)
+    max_center = int(max(centers.max(), 0)) + 2
+    row_ids, unique_keys = pd.factorize(peptide_ids.astype(np.int64) * max_center + (centers.to_numpy() + 1))
+
+    windows = []
+    for key in unique_keys:
+        peptide = unique_peptides[key // max_center]
+        center = key % max_center - 1
+        if center < 0:
+            windows.append(PAD_CHAR * width)
+            continue
+        # shift the window so the modified residue lands on index `half`
+        start = center - half
+        aligned = PAD_CHAR * max(-start, 0) + peptide[max(start, 0):]
+        windows.append(aligned[:width].ljust(width, PAD_CHAR))
+
+    residues = np.frombuffer("".join(windows).encode("ascii"), dtype=np.uint8).reshape(len(windows), width)
+    return {
+        "width": width,
+        "center": half,
+        "residues": residues,
+        "row_ids": row_ids,
+        "bitmaps": {},
+    }
+
+
+def _bitmap(index, column, residue):
+    """
+    Helper function returning the packed bitmap of unique windows with `residue` at window `column`.
+    """
+    key = (column, residue)
+    if key not in index["bitmaps"]:
+        index["bitmaps"][key] = np.packbits(index["residues"][:, column] == ord(residue))
+    return index["bitmaps"][key]
+
+
+def _residue_bitmap(index, column, residues):
+    bitmap = _bitmap(index, column, residues[0])
+    for residue in residues[1:]:
+        bitmap = bitmap | _bitmap(index, column, residue)
+    return bitmap
+
+
+def _to_row_mask(index, packed):
+    n_unique = index["residues"].shape[0]
+    unique_mask = np.unpackbits(packed, count=n_unique).astype(bool)
+    return unique_mask[index["row_ids"]]
+
+
+def parse_motif(motif):
+    """
+    Parses a motif such as "R.[ST]P" or "RxxSP" into one entry per position: a string of allowed
+    residues, or None for a wildcard ('.', 'x' or 'X').
+    """
+    positions = []
+    for token in re.findall(r"\[[A-Z]+\]|.", motif):
+        if token in WILDCARDS:
+            positions.append(None)
+        elif token.startswith("["):
+            positions.append(token[1:-1])
+        elif token.isalpha() and token.isupper():
+            positions.append(token)
+        else:
+            raise ValueError(f"Invalid motif token '{token}' in '{motif}'")
+    return positions
+
+
+def position_mask(index, offset, residues):
+    """
+    Returns a boolean row mask of windows with one of `residues` at `offset` from the modified residue
+    (e.g. offset=1, residues="P" for a proline at +1).
+    """
+    column = index["center"] + offset
+    if not 0 <= column < index["width"]:
+        raise ValueError(f"Offset {offset} is outside the {index['width']}-residue window")
+    return _to_row_mask(index, _residue_bitmap(index, column, residues))
+
+
+def motif_mask(index, motif, offset=None):
+    """
+    Returns a boolean row mask of windows matching `motif`.
+
+    Parameters:
+    - index (dict): Index from `build_window_index`.
+    - motif (str): Motif, see `parse_motif`.
+    - offset (int, optional): Offset from the modified residue at which the first motif position must
+      be. If None, the motif may start anywhere in the window.
+    """
+    positions = parse_motif(motif)
+    width = index["width"]
+    n_unique = index["residues"].shape[0]
+    if offset is None:
+        starts = range(0, width - len(positions) + 1)
+    else:
+        starts = [index["center"] + offset]
+        if starts[0] < 0 or starts[0] + len(positions) > width:
+            raise ValueError(f"Motif '{motif}' at offset {offset} does not fit in the {width}-residue window")
+
+    matched = np.zeros((n_unique + 7) // 8, dtype=np.uint8)
+    for start in starts:
+        packed = np.full((n_unique + 7) // 8, 0xFF, dtype=np.uint8)
+        for i, residues in enumerate(positions):
+            if residues is not None:
+                packed &= _residue_bitmap(index, start + i, residues)
+        matched |= packed
+    return _to_row_mask(index, matched)